@@ -1,7 +1,225 @@
 #!/usr/bin/env python3
 
+import queue
+import threading
+
 import cv2
 import mediapipe as mp
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Numba is optional; without it the decorated functions run as plain
+    # Python:
+    def njit(*args, **kwargs):
+        def decorator(func):
+            return func
+        return decorator
+
+# Landmark indices of the thumb, index, middle, ring and little finger tips:
+FINGER_TIPS = [4, 8, 12, 16, 20]
+
+@njit(cache=True)
+def _count_fingers(ys, thumb_index_threshold, index_middle_threshold):
+    """
+    Count the number of fingers held up from the finger tip y positions.
+
+    Args:
+        ys (numpy.ndarray): float32 y positions of the thumb, index, middle,
+        ring and little finger tips.
+
+        thumb_index_threshold (float): Threshold for thumb-index distance.
+
+        index_middle_threshold (float): Threshold for index-middle distance.
+
+    Returns:
+        int: Number of fingers held up.
+    """
+    # Check for closed fist gesture:
+    if abs(ys[0] - ys[1]) < thumb_index_threshold and abs(ys[1] - ys[2]) < index_middle_threshold:
+        return 0
+
+    # Each of the thumb, index, middle and ring fingers counts if its tip is
+    # above the next finger's tip, and the little finger always counts:
+    finger_count = 1
+    for i in range(4):
+        if ys[i] < ys[i + 1]:
+            finger_count += 1
+    return finger_count
+
+@njit(cache=True)
+def _count_fingers_batch(ys, thresholds):
+    """
+    Count the number of fingers held up on each of several hands.
+
+    Args:
+        ys (numpy.ndarray): (num_hands, 5) float32 array of finger tip y
+        positions, one row per hand.
+
+        thresholds (numpy.ndarray): float32 thumb-index and index-middle
+        distance thresholds.
+
+    Returns:
+        numpy.ndarray: (num_hands,) array of finger counts.
+    """
+    finger_counts = np.empty(ys.shape[0], dtype=np.int32)
+    for i in range(ys.shape[0]):
+        finger_counts[i] = _count_fingers(ys[i], thresholds[0], thresholds[1])
+    return finger_counts
+
+def put_latest(q, item, on_drop=None):
+    """
+    Put an item on a bounded queue, dropping the oldest item if it is full.
+
+    Args:
+        q (queue.Queue): Queue to put the item on.
+
+        item: Item to put on the queue.
+
+        on_drop (callable): Called with the dropped item, if any.
+    """
+    try:
+        q.put_nowait(item)
+    except queue.Full:
+        # Make room by discarding the oldest item:
+        try:
+            dropped = q.get_nowait()
+        except queue.Empty:
+            pass
+        else:
+            if on_drop is not None:
+                on_drop(dropped)
+        q.put_nowait(item)
+
+class FrameGrabber:
+    """
+    This class continuously reads frames from a video capture object on a
+    background thread, mirrors them and converts them to RGB, and hands them
+    on through a small queue that drops the oldest frame when full, so later
+    stages never block on camera I/O or frame decoding.
+    """
+
+    def __init__(self, cap, stop_event, maxsize=2, inference_width=320, num_buffers=8):
+        """
+        Initialize the FrameGrabber object and start the capture thread.
+
+        Attributes:
+            cap (cv2.VideoCapture): Video capture object to read from.
+
+            stop_event (threading.Event): Event signalling all pipeline
+            stages to stop. It is also set here if the capture fails.
+
+            queue (queue.Queue): Queue of (buf_idx, frame, image) tuples,
+            where `frame` is the mirrored BGR frame, `image` its RGB copy and
+            `buf_idx` the index of the buffers holding them.
+
+            inference_width (int): Maximum width of `image`. Wider frames
+            are downscaled, keeping their aspect ratio, before conversion.
+
+            num_buffers (int): Number of preallocated sets of frame and
+            image buffers. Each captured frame takes a buffer index from
+            `free`, and it is only filled again once `release()` hands it
+            back. If no buffer is free, the captured frame is skipped.
+
+            free (queue.Queue): Indices of the buffers not in use by any
+            pipeline stage.
+
+            _flip_bufs (list): Preallocated buffers for mirrored frames.
+
+            _small_bufs (list): Preallocated buffers for downscaled frames.
+
+            _rgb_bufs (list): Preallocated buffers for RGB images.
+        """
+        self.cap = cap
+        self.stop_event = stop_event
+        self.inference_width = inference_width
+        self.num_buffers = num_buffers
+        # Buffers are allocated from the first frame's shape:
+        self._flip_bufs = None
+        self._small_bufs = None
+        self._rgb_bufs = None
+        self.free = queue.Queue()
+        for buf_idx in range(num_buffers):
+            self.free.put_nowait(buf_idx)
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def _loop(self):
+        """
+        Read and preprocess frames until stopped or the capture fails. The
+        Python work around the OpenCV calls is kept to a minimum so other
+        stages can run while they do.
+        """
+        while not self.stop_event.is_set():
+            ret, frame = self.cap.read()
+            if not ret:
+                self.stop_event.set()
+                break
+
+            # Work out the size of the image passed to MediaPipe and allocate
+            # the buffers on the first frame:
+            h, w = frame.shape[:2]
+            if w > self.inference_width:
+                size = (self.inference_width, round(h * self.inference_width / w))
+            else:
+                size = (w, h)
+            if self._flip_bufs is None:
+                self._flip_bufs = [np.empty_like(frame) for _ in range(self.num_buffers)]
+                self._small_bufs = [np.empty((size[1], size[0], 3), dtype=np.uint8) for _ in range(self.num_buffers)]
+                self._rgb_bufs = [np.empty((size[1], size[0], 3), dtype=np.uint8) for _ in range(self.num_buffers)]
+
+            # Take a free set of buffers, skipping this frame if later stages
+            # still hold all of them:
+            try:
+                buf_idx = self.free.get_nowait()
+            except queue.Empty:
+                continue
+            flip_buf = self._flip_bufs[buf_idx]
+            small_buf = self._small_bufs[buf_idx]
+            rgb_buf = self._rgb_bufs[buf_idx]
+
+            # Flip the frame horizontally for a mirrored effect:
+            frame = cv2.flip(frame, 1, dst=flip_buf)
+
+            # Downscale the frame for MediaPipe; the landmarks it returns are
+            # normalized, so they still map onto the full-size frame:
+            small = frame
+            if size != (w, h):
+                small = cv2.resize(frame, size, dst=small_buf, interpolation=cv2.INTER_AREA)
+
+            # Convert the BGR color image to RGB format for processing by
+            # MediaPipe:
+            image = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=rgb_buf)
+
+            put_latest(self.queue, (buf_idx, frame, image), self.release_item)
+
+    def release(self, buf_idx):
+        """
+        Hand a set of buffers back once no stage uses them any more.
+
+        Args:
+            buf_idx (int): Index of the buffers to release.
+        """
+        self.free.put_nowait(buf_idx)
+
+    def release_item(self, item):
+        """
+        Release the buffers of a pipeline item whose first element is its
+        buffer index. Used when a queue drops the item.
+
+        Args:
+            item (tuple): Pipeline item to release.
+        """
+        self.release(item[0])
+
+    def stop(self):
+        """
+        Stop the capture thread and wait for it to finish.
+        """
+        self.stop_event.set()
+        self.thread.join()
 
 class HandGestureCounter:
     """
@@ -16,50 +234,124 @@ class HandGestureCounter:
     adjust the threshold, it usually spawns behind the camera window.
     """
 
-    def __init__(self):
+    def __init__(self, max_num_hands=2, inference_width=320):
         """
         Initialize the HandGestureCounter object.
 
+        Args:
+            max_num_hands (int): Maximum number of hands to detect. Use 1 if
+            only one hand needs counting; MediaPipe then runs the landmark
+            model once per frame instead of once per hand.
+
+            inference_width (int): Maximum width of the frames passed to
+            MediaPipe. Wider camera frames are downscaled first; the
+            displayed frame stays full size.
+
         Attributes:
             cap (cv2.VideoCapture): Video capture object.
 
+            stop_event (threading.Event): Event signalling the pipeline
+            threads to stop.
+
+            grabber (FrameGrabber): Capture stage producing mirrored BGR
+            frames and their RGB copies.
+
+            results_queue (queue.Queue): Queue of (buf_idx, frame, results)
+            tuples passed from the inference stage to the display stage.
+
             mp_hands (mp.solutions.hands): MediaPipe Hands object for hand
             detection.
 
             hands (mp.solutions.hands.Hands): Hands object for hand detection.
-            mp_drawing (mp.solutions.drawing_utils): MediaPipe drawing utility.
+
+            max_num_hands (int): Maximum number of hands to detect.
+
+            _lm_buf (numpy.ndarray): Preallocated (max_num_hands, 21, 2)
+            float32 buffer for landmark positions.
+
+            _lm_xy_buf (numpy.ndarray): Preallocated (max_num_hands, 21, 2)
+            int32 buffer for landmark pixel positions.
+
+            _scale (numpy.ndarray): (width, height) of the last displayed
+            frame, used to scale the normalized landmarks to pixels.
+
+            hand_connections (numpy.ndarray): (K, 2) array of landmark index
+            pairs joined by the hand skeleton.
 
             text_position_left (tuple): Position of left-hand text display.
 
             text_position_right (tuple): Position of right-hand text display.
 
-            thumb_index_threshold (float): Default threshold for thumb-index
-            distance.
+            _labels (dict): Finger count text for each (hand side, finger
+            count) pair.
+
+            thresholds (numpy.ndarray): float32 thumb-index and index-middle
+            distance thresholds, kept in an array so they can be passed
+            straight to the compiled finger counter.
 
-            index_middle_threshold (float): Default threshold for index-middle
-            distance.
+            inference_interval (int): Run hand detection on every Nth frame
+            and reuse the previous results in between.
+
+            frame_idx (int): Number of frames seen by the inference stage.
+
+            last_results: Most recent MediaPipe hand detection results.
         """
         # Initialize VideoCapture for accessing the camera:
         self.cap = cv2.VideoCapture(0)
+        # Request MJPG frames, which most webcams compress in hardware, at
+        # 640x480 and 30 FPS:
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        self.cap.set(cv2.CAP_PROP_FPS, 30)
+        # Keep the driver queue short so frames are not stale when read:
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        # Signal shared by all pipeline stages to stop:
+        self.stop_event = threading.Event()
+        # Read frames on a background thread:
+        self.grabber = FrameGrabber(self.cap, self.stop_event, inference_width=inference_width)
+        # Hand inference results over to the display stage:
+        self.results_queue = queue.Queue(maxsize=2)
+        # Maximum number of hands to detect:
+        self.max_num_hands = max_num_hands
         # Initialize Mediapipe hands module:
         self.mp_hands = mp.solutions.hands
-        # Create an instance of the hands detector:
-        self.hands = self.mp_hands.Hands()
-        # Initialize Mediapipe drawing utilities:
-        self.mp_drawing = mp.solutions.drawing_utils
+        # Create an instance of the hands detector, using the lighter
+        # landmark model. Video mode lets MediaPipe track hands from the
+        # previous frame's landmarks instead of re-running palm detection on
+        # every frame:
+        self.hands = self.mp_hands.Hands(static_image_mode=False, model_complexity=0, max_num_hands=self.max_num_hands,
+                                         min_detection_confidence=0.5, min_tracking_confidence=0.5)
+        # Reusable buffer for each frame's landmark positions:
+        self._lm_buf = np.empty((self.max_num_hands, 21, 2), dtype=np.float32)
+        self._lm_xy_buf = np.empty((self.max_num_hands, 21, 2), dtype=np.int32)
+        # Scale is set from the first displayed frame's size:
+        self._scale = None
+        # Landmark index pairs for drawing the hand skeleton:
+        self.hand_connections = np.array(list(self.mp_hands.HAND_CONNECTIONS), dtype=np.int32)
         # Initial position for left-hand text display:
         self.text_position_left = (10, 30)
         # Initial position for right-hand text display:
         self.text_position_right = (10, 60)
+        # Format every possible finger count text once:
+        self._labels = {(side, n): f"{side} Hand Fingers: {n}" for side in ("Left", "Right") for n in range(6)}
 
         # Initialize default threshold values:
-        self.thumb_index_threshold = 0.1
-        self.index_middle_threshold = 0.1
+        self.thresholds = np.array([0.1, 0.1], dtype=np.float32)
+
+        # Only detect hands on every other frame:
+        self.inference_interval = 2
+        self.frame_idx = 0
+        self.last_results = None
+
+        # Compile the finger counter up front rather than on the first
+        # detected hand:
+        _count_fingers_batch(np.zeros((1, 5), dtype=np.float32), self.thresholds)
 
         # Create a separate window for sliders:
         cv2.namedWindow("Threshold Sliders")
-        cv2.createTrackbar("Thumb-Index Threshold", "Threshold Sliders", int(self.thumb_index_threshold * 100), 100, self.on_thumb_index_threshold_change)
-        cv2.createTrackbar("Index-Middle Threshold", "Threshold Sliders", int(self.index_middle_threshold * 100), 100, self.on_index_middle_threshold_change)
+        cv2.createTrackbar("Thumb-Index Threshold", "Threshold Sliders", int(self.thresholds[0] * 100), 100, self.on_thumb_index_threshold_change)
+        cv2.createTrackbar("Index-Middle Threshold", "Threshold Sliders", int(self.thresholds[1] * 100), 100, self.on_index_middle_threshold_change)
 
     def on_thumb_index_threshold_change(self, value):
         """
@@ -68,7 +360,7 @@ class HandGestureCounter:
         Args:
             value (int): New value of the slider.
         """
-        self.thumb_index_threshold = value / 100.0
+        self.thresholds[0] = value / 100.0
 
     def on_index_middle_threshold_change(self, value):
         """
@@ -77,128 +369,127 @@ class HandGestureCounter:
         Args:
             value (int): New value of the slider.
         """
-        self.index_middle_threshold = value / 100.0
+        self.thresholds[1] = value / 100.0
 
-    def count_fingers(self, lm_list):
+    def count_fingers(self, lms):
         """
-        Count the number of fingers held up based on landmark positions.
+        Count the number of fingers held up on each hand based on landmark
+        positions.
 
         Args:
-            lm_list (list): List of hand landmark positions.
+            lms (numpy.ndarray): (num_hands, 21, 2) float32 array of hand
+            landmark pixel positions, one (x, y) row per landmark.
 
         Returns:
-            int: Number of fingers held up.
+            numpy.ndarray: Number of fingers held up on each hand.
         """
-        # Get the thumb-index and index-middle thresholds:
-        thumb_index_threshold = self.thumb_index_threshold
-        index_middle_threshold = self.index_middle_threshold
-
-        # Finger landmark indices:
-        thumb_tip = lm_list[4]
-        index_tip = lm_list[8]
-        middle_tip = lm_list[12]
-        ring_tip = lm_list[16]
-        little_tip = lm_list[20]
-
-        # Calculate the distance between thumb tip and index finger tip:
-        thumb_index_dist = abs(thumb_tip['y'] - index_tip['y'])
+        # Y positions of the thumb, index, middle, ring and little finger
+        # tips of every hand. Fancy indexing returns a Fortran-ordered array
+        # here, so make it C-ordered to match the version of
+        # `_count_fingers_batch` compiled in `__init__`:
+        ys = np.ascontiguousarray(lms[:, FINGER_TIPS, 1])
 
-        # Calculate the distance between index finger tip and middle finger
-        # tip:
-        index_middle_dist = abs(index_tip['y'] - middle_tip['y'])
+        return _count_fingers_batch(ys, self.thresholds)
 
-        # Check for closed fist gesture:
-        if thumb_index_dist < thumb_index_threshold and index_middle_dist < index_middle_threshold:
-            return 0
-
-        # Count fingers held up:
-        finger_count = 0
-
-        # Thumb:
-        if thumb_tip['y'] < index_tip['y']:
-            finger_count += 1
-
-        # Index finger:
-        if index_tip['y'] < middle_tip['y']:
-            finger_count += 1
-
-        # Middle finger:
-        if middle_tip['y'] < ring_tip['y']:
-            finger_count += 1
-
-        # Ring finger:
-        if ring_tip['y'] < little_tip['y']:
-            finger_count += 1
+    def _inference_loop(self):
+        """
+        Run MediaPipe hand detection on frames from the capture stage and pass
+        the results on to the display stage. Detection only runs on every
+        `inference_interval`-th frame; the frames in between are paired with
+        the previous results.
+
+        The Python work around `hands.process()` is kept to the queue
+        handoff; landmark conversion, finger counting and drawing belong to
+        the display stage.
+        """
+        while not self.stop_event.is_set():
+            try:
+                buf_idx, frame, image = self.grabber.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
 
-        # Little finger:
-        finger_count += 1
+            # Process the image to detect hand landmarks using the MediaPipe
+            # Hands model, reusing the last results on skipped frames:
+            if self.frame_idx % self.inference_interval == 0:
+                self.last_results = self.hands.process(image)
+            self.frame_idx += 1
+            results = self.last_results
 
-        return finger_count
+            put_latest(self.results_queue, (buf_idx, frame, results), self.grabber.release_item)
 
     def run(self):
         """
         Run the hand gesture counter.
 
         This method captures video frames, detects hand landmarks, counts fingers,
-        and displays the results on the video feed.
+        and displays the results on the video feed. Capture and detection run on
+        background threads; drawing and display stay on the main thread, which
+        OpenCV's GUI functions require.
         """
-        while True:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
+        inference_thread = threading.Thread(target=self._inference_loop, daemon=True)
+        inference_thread.start()
 
-            # Flip the frame horizontally for a mirrored effect:
-            frame = cv2.flip(frame, 1)
-
-            # Convert the BGR color image to RGB format for processing by
-            # MediaPipe:
-            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # Process the image to detect hand landmarks using the MediaPipe
-            # Hands model:
-            results = self.hands.process(image)
+        while not self.stop_event.is_set():
+            try:
+                buf_idx, frame, results = self.results_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
 
             # Check if there are multiple hand landmarks detected in the frame:
             if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
-                    # Draw hand landmarks and connections on the frame:
-                    self.mp_drawing.draw_landmarks(frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-
-                    # Convert hand landmarks to a list of dictionary entries:
-                    lm_list = []
-                    for lm in hand_landmarks.landmark:
-                        lm_list.append({
-                            'x': int(lm.x * frame.shape[1]),
-                            'y': int(lm.y * frame.shape[0])
-                        })
-
-                    # Count the number of fingers held up using landmarks:
-                    finger_count = self.count_fingers(lm_list)
-
-                    # Determine if the hand is on the left or right side of the
-                    # frame:
-                    hand_side = "Left" if lm_list[0]['x'] < frame.shape[1] // 2 else "Right"
+                # Frame size, used to scale the normalized landmarks to
+                # pixels. It only changes if the camera's frame size does:
+                h, w = frame.shape[:2]
+                if self._scale is None or self._scale[0] != w or self._scale[1] != h:
+                    self._scale = np.array([w, h], dtype=np.float32)
+
+                # Convert all hands' landmarks to (num_hands, 21, 2) arrays of
+                # pixel positions, rounded in the preallocated float32 buffer
+                # and copied into the preallocated int32 buffer for drawing:
+                num_hands = len(results.multi_hand_landmarks)
+                lms = self._lm_buf[:num_hands]
+                for i, hand_landmarks in enumerate(results.multi_hand_landmarks):
+                    for j, lm in enumerate(hand_landmarks.landmark):
+                        lms[i, j, 0] = lm.x
+                        lms[i, j, 1] = lm.y
+                np.multiply(lms, self._scale, out=lms)
+                np.rint(lms, out=lms)
+                lm_xy = self._lm_xy_buf[:num_hands]
+                np.copyto(lm_xy, lms, casting='unsafe')
+
+                # Count the number of fingers held up on every hand at once:
+                finger_counts = self.count_fingers(lms)
+
+                for hand_xy, handedness, finger_count in zip(lm_xy, results.multi_handedness, finger_counts):
+                    # Draw hand connections as line segments in one call, then
+                    # the landmarks on top:
+                    cv2.polylines(frame, hand_xy[self.hand_connections], False, (224, 224, 224), 2)
+                    for x, y in hand_xy.tolist():
+                        cv2.circle(frame, (x, y), 3, (0, 0, 255), -1)
+
+                    # Determine whether this is the left or right hand. The
+                    # frame is mirrored before detection, so MediaPipe's label
+                    # matches the user's own hand:
+                    hand_side = handedness.classification[0].label
 
                     # Display finger count text on the frame:
-                    if hand_side == "Left":
-                        cv2.putText(frame, f"{hand_side} Hand Fingers: {finger_count}", self.text_position_left,
-                                    cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
-                    else:
-                        cv2.putText(frame, f"{hand_side} Hand Fingers: {finger_count}", self.text_position_right,
-                                    cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
-
-                # Reset text positions for the next frame:
-                self.text_position_left = (10, 30)
-                self.text_position_right = (10, 60)
+                    text_position = self.text_position_left if hand_side == "Left" else self.text_position_right
+                    cv2.putText(frame, self._labels[(hand_side, finger_count)], text_position,
+                                cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
 
             cv2.imshow('Hand Tracking', frame)
+            # The frame has been shown, so its buffers can be reused:
+            self.grabber.release(buf_idx)
 
-            # Exit the loop if the window is closed:
-            if cv2.waitKey(1) == ord('q'):
-                break
+            # Exit the loop if the window is closed. Unlike `waitKey(1)`,
+            # `pollKey()` handles window events without waiting a millisecond:
+            if cv2.pollKey() == ord('q'):
+                self.stop_event.set()
 
         # Release the VideoCapture, destroy OpenCV windows, and cleanup the
         # slider window:
+        self.grabber.stop()
+        inference_thread.join()
         self.cap.release()
         cv2.destroyAllWindows()
         cv2.destroyWindow("Threshold Sliders")